@@ -1,18 +1,40 @@
+import gzip
 import json
+import os
+import re
+from collections import OrderedDict
 from typing import List, Dict, Tuple, Union
+from integrity import IntegrityChecker, Issue, is_number
+
+READ_ONLY_MESSAGE = "Archived terms are read-only."
+CURRENT_TERM = "Current Term"
+ARCHIVE_CACHE_SIZE = 2  # Number of decompressed archived terms kept in memory
 
 class GradebookController:
-    def __init__(self):
+    def __init__(self, data_file: str = 'data.json', load: bool = True, archive_dir: str = 'archive', repair: bool = False):
         """
         Initializes a GradebookController object.
-        """
+
+        Parameters:
+        - data_file (str): The path of the JSON file holding the active term. Defaults to 'data.json'.
+        - load (bool): Whether to load the class list from the file. Defaults to True.
+        - archive_dir (str): The directory holding archived terms and their student index. Defaults to 'archive'.
+        - repair (bool): Whether to automatically repair integrity issues in the active term. Defaults to False.
+        """
+        self.data_file = data_file
+        self.archive_dir = archive_dir
+        self.term = None
+        self.archive_cache = OrderedDict()
+        self.repair = repair
+        self.integrity = IntegrityChecker(repair)
         self.current_class_data = {}
         self.classes = []
-        self.load_data()
+        if load:
+            self.load_data()
 
     def load_data(self, class_id: str = None) -> None:
         """
-        Loads the data from the 'data.json' file and updates the class data.
+        Loads the data from the gradebook file and updates the class data.
 
         Parameters:
         - class_id (str): The ID of the class to load data for. If not provided, loads data for all classes.
@@ -21,14 +43,222 @@ class GradebookController:
         None
         """
         try:
-            with open('data.json', 'r') as file:
-                data = json.load(file)
+            data = self.read_data()
+            if not self.integrity.checked and self.integrity.check_all(data):
+                with open(self.data_file, 'w') as file:
+                    json.dump(data, file, indent=4)
             self.classes = list(data.keys())
             if class_id:
                 self.current_class_data = data.get(class_id, {})
         except Exception as e:
             pass
 
+    def read_data(self) -> Dict:
+        """
+        Returns the data of the open term: the active gradebook file, or the archive if an archived term is open.
+
+        Returns:
+        - Dict: The class data of the open term, keyed by class ID.
+        """
+        if self.term is not None:
+            return self.read_archive(self.term)
+        with open(self.data_file, 'r') as file:
+            return json.load(file)
+
+    def archive_path(self, term_name: str) -> str:
+        """
+        Returns the path of the compressed archive file for a term.
+
+        Parameters:
+        - term_name (str): The name of the term.
+
+        Returns:
+        - str: The path of the archive file.
+        """
+        return os.path.join(self.archive_dir, re.sub(r"[^\w.-]", "_", term_name) + ".json.gz")
+
+    def read_archive(self, term_name: str) -> Dict:
+        """
+        Returns the data of an archived term. Only the most recently used terms are kept in memory.
+
+        Parameters:
+        - term_name (str): The name of the term.
+
+        Returns:
+        - Dict: The class data of the term, keyed by class ID.
+        """
+        if term_name in self.archive_cache:
+            self.archive_cache.move_to_end(term_name)
+            return self.archive_cache[term_name]
+        with gzip.open(self.archive_path(term_name), 'rt', encoding='utf-8') as file:
+            data = json.load(file)
+        self.archive_cache[term_name] = data
+        while len(self.archive_cache) > ARCHIVE_CACHE_SIZE:
+            self.archive_cache.popitem(last=False)
+        return data
+
+    def read_archive_index(self) -> Dict:
+        """
+        Returns the archive index: the archived terms in order, and for every student the classes they took and their overall grade.
+
+        Returns:
+        - Dict: {"terms": [term, ...], "students": {student: [[term, class_id, grade], ...]}}
+        """
+        try:
+            with open(os.path.join(self.archive_dir, 'index.json'), 'r') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {"terms": [], "students": {}}
+
+    def get_terms(self) -> List[str]:
+        """
+        Returns a list of archived term names, oldest first.
+
+        Returns:
+        - List[str]: A list of term names.
+        """
+        return self.read_archive_index()["terms"]
+
+    def open_term(self, term_name: Union[str, None] = None) -> Tuple[bool, str]:
+        """
+        Switches the controller to an archived term, read-only, or back to the active term.
+
+        Parameters:
+        - term_name (Union[str, None]): The name of the archived term to open, or None for the active term.
+
+        Returns:
+        - Tuple[bool, str]: A tuple indicating whether the term was opened successfully (True/False) and a message describing the result.
+        """
+        if term_name is not None and term_name not in self.get_terms():
+            return False, "Term does not exist."
+        self.term = term_name
+        self.integrity = IntegrityChecker(self.repair and term_name is None)
+        self.current_class_data = {}
+        self.classes = []
+        self.load_data()
+        return True, "Term opened successfully."
+
+    def archive_term(self, term_name: str) -> Tuple[bool, str]:
+        """
+        Moves the active term into a compressed read-only archive and starts a new, empty active term.
+
+        Parameters:
+        - term_name (str): The name to archive the active term under.
+
+        Returns:
+        - Tuple[bool, str]: A tuple indicating whether the term was archived successfully (True/False) and a message describing the result.
+        """
+        if self.term is not None:
+            return False, READ_ONLY_MESSAGE
+        if not term_name.strip() or term_name == CURRENT_TERM:
+            return False, "Invalid term name."
+        index_path = os.path.join(self.archive_dir, 'index.json')
+        path = self.archive_path(term_name)
+        archived = False
+        indexed = False
+        try:
+            index = self.read_archive_index()
+            if term_name in index["terms"]:
+                return False, "Term already exists."
+            if os.path.exists(path):
+                return False, f"Term name conflicts with the existing archive file {os.path.basename(path)}."
+            previous_index = json.dumps(index)
+            with open(self.data_file, 'r') as file:
+                data = json.load(file)
+            os.makedirs(self.archive_dir, exist_ok=True)
+            with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as file:
+                json.dump(data, file, separators=(',', ':'))
+            index["terms"].append(term_name)
+            for class_id, class_data in data.items():
+                for student, student_grades in class_data.items():
+                    index["students"].setdefault(student, []).append([term_name, class_id, self.compute_grade(student_grades)])
+            with open(index_path + '.tmp', 'w') as file:
+                json.dump(index, file)
+            os.replace(path + '.tmp', path)
+            archived = True
+            os.replace(index_path + '.tmp', index_path)
+            indexed = True
+            with open(self.data_file, 'w') as file:
+                json.dump({}, file, indent=4)
+            self.integrity = IntegrityChecker(self.repair)
+            self.current_class_data = {}
+            self.load_data()
+            return True, "Term archived successfully."
+        except Exception as e:
+            # Undo the steps already taken, so the term can be archived again
+            try:
+                if indexed:
+                    with open(index_path, 'w') as file:
+                        file.write(previous_index)
+                if archived:
+                    os.remove(path)
+                for tmp_path in (path + '.tmp', index_path + '.tmp'):
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+            except OSError:
+                pass
+            return False, "Failed to archive term."
+
+    def get_student_history(self, student_name: str) -> List[Tuple[Union[str, None], str, Union[float, None]]]:
+        """
+        Returns a student's grades across all terms and classes.
+
+        Archived grades come from the archive index, so no archive has to be opened.
+
+        Parameters:
+        - student_name (str): The name of the student.
+
+        Returns:
+        - List[Tuple[Union[str, None], str, Union[float, None]]]: (term, class ID, overall grade) for every class the student took, oldest term first. The active term is reported as None.
+        """
+        history = []
+        for term_name, class_id, percentage in self.read_archive_index()["students"].get(student_name, []):
+            history.append((term_name, class_id, percentage))
+        try:
+            with open(self.data_file, 'r') as file:
+                data = json.load(file)
+        except Exception as e:
+            data = {}
+        for class_id, class_data in data.items():
+            if student_name in class_data:
+                history.append((None, class_id, self.compute_grade(class_data[student_name])))
+        return history
+
+    def get_integrity_issues(self) -> List[Issue]:
+        """
+        Returns the integrity issues found in the open term, kept up to date after every change.
+
+        Returns:
+        - List[Issue]: The issues found.
+        """
+        if not self.integrity.checked:
+            self.load_data()
+        return self.integrity.get_issues()
+
+    def repair_data(self) -> Tuple[bool, str]:
+        """
+        Repairs the integrity issues that can be fixed automatically in the active term.
+
+        Returns:
+        - Tuple[bool, str]: A tuple indicating whether the data was checked successfully (True/False) and a message describing the result.
+        """
+        if self.term is not None:
+            return False, READ_ONLY_MESSAGE
+        try:
+            with open(self.data_file, 'r') as file:
+                data = json.load(file)
+            self.integrity = IntegrityChecker(True)
+            repaired = self.integrity.check_all(data)
+            self.integrity.repair = self.repair
+            if repaired:
+                with open(self.data_file, 'w') as file:
+                    json.dump(data, file, indent=4)
+            self.load_data()
+            remaining = len(self.integrity.get_issues())
+            return True, f"Data repaired, {remaining} issues left." if repaired else f"Nothing to repair, {remaining} issues left."
+        except Exception as e:
+            return False, "Failed to repair data."
+
     def get_students(self) -> List[str]:
         """
         Returns a list of student names in the current class.
@@ -108,13 +338,16 @@ class GradebookController:
         Returns:
         - Tuple[bool, str]: A tuple indicating whether the class was added successfully (True/False) and a message describing the result.
         """
+        if self.term is not None:
+            return False, READ_ONLY_MESSAGE
         try:
-            with open('data.json', 'r') as file:
+            with open(self.data_file, 'r') as file:
                 data = json.load(file)
             if class_name in data:
                 return False, "Class already exists."
             data[class_name] = {}
-            with open('data.json', 'w') as file:
+            self.integrity.check_class(data, class_name)
+            with open(self.data_file, 'w') as file:
                 json.dump(data, file, indent=4)
             self.load_data(class_name)
             return True, "Class added successfully."
@@ -132,8 +365,10 @@ class GradebookController:
         Returns:
         - Tuple[bool, str]: A tuple indicating whether the student was added successfully (True/False) and a message describing the result.
         """
+        if self.term is not None:
+            return False, READ_ONLY_MESSAGE
         try:
-            with open('data.json', 'r') as file:
+            with open(self.data_file, 'r') as file:
                 data = json.load(file)
             if class_id not in data:
                 data[class_id] = {}
@@ -142,34 +377,40 @@ class GradebookController:
                 assignments = self.get_assignments()
                 for assignment in assignments:
                     data[class_id][student_name][assignment] = {"score": "Not Graded", "max_points": self.get_max_points(assignment)}
-            with open('data.json', 'w') as file:
+            self.integrity.check_class(data, class_id)
+            with open(self.data_file, 'w') as file:
                 json.dump(data, file, indent=4)
             self.load_data(class_id)
             return True, "Student added successfully."
         except Exception as e:
             return False, "Failed to add student."
 
-    def add_assignment(self, class_id: str, assignment_name: str, max_points: Union[int, None] = None, initial_grade: Union[int, None] = None) -> Tuple[bool, str]:
+    def add_assignment(self, class_id: str, assignment_name: str, max_points: Union[int, float], initial_grade: Union[int, None] = None) -> Tuple[bool, str]:
         """
         Adds a new assignment to a class.
 
         Parameters:
         - class_id (str): The ID of the class to add the assignment to.
         - assignment_name (str): The name of the assignment to add.
-        - max_points (Union[int, None]): The maximum points for the assignment. Defaults to None.
+        - max_points (Union[int, float]): The maximum points for the assignment, a number of 0 or more.
         - initial_grade (Union[int, None]): The initial grade for the assignment. Defaults to None.
 
         Returns:
         - Tuple[bool, str]: A tuple indicating whether the assignment was added successfully (True/False) and a message describing the result.
         """
+        if self.term is not None:
+            return False, READ_ONLY_MESSAGE
+        if not is_number(max_points) or max_points < 0:
+            return False, "Maximum points must be a number of 0 or more."
         try:
-            with open('data.json', 'r') as file:
+            with open(self.data_file, 'r') as file:
                 data = json.load(file)
             if class_id not in data:
                 return False, "Class does not exist."
             for student in data[class_id]:
                 data[class_id][student][assignment_name] = {"score": initial_grade if initial_grade is not None else "Not Graded", "max_points": max_points}
-            with open('data.json', 'w') as file:
+            self.integrity.check_class(data, class_id)
+            with open(self.data_file, 'w') as file:
                 json.dump(data, file, indent=4)
             self.load_data(class_id)
             return True, "Assignment added successfully."
@@ -189,19 +430,59 @@ class GradebookController:
         Returns:
         - bool: True if the grade was updated successfully, False otherwise.
         """
+        if self.term is not None:
+            return False
         try:
-            with open('data.json', 'r') as file:
+            with open(self.data_file, 'r') as file:
                 data = json.load(file)
             if class_id not in data or student_name not in data[class_id] or assignment_name not in data[class_id][student_name]:
                 return False
             data[class_id][student_name][assignment_name]['score'] = grade
-            with open('data.json', 'w') as file:
+            self.integrity.check_grade(data, class_id, student_name, assignment_name)
+            with open(self.data_file, 'w') as file:
                 json.dump(data, file, indent=4)
             self.load_data(class_id)
             return True
         except Exception as e:
             return False
 
+    def update_grades(self, class_id: str, grades: List[Tuple[str, str, int]]) -> Tuple[bool, str]:
+        """
+        Updates many grades in a class with a single read and write of the gradebook file.
+
+        Parameters:
+        - class_id (str): The ID of the class.
+        - grades (List[Tuple[str, str, int]]): The (student name, assignment name, grade) updates to apply, in order.
+
+        Returns:
+        - Tuple[bool, str]: A tuple indicating whether the grades were updated successfully (True/False) and a message describing the result.
+        """
+        if self.term is not None:
+            return False, READ_ONLY_MESSAGE
+        try:
+            with open(self.data_file, 'r') as file:
+                data = json.load(file)
+            if class_id not in data:
+                return False, "Class does not exist."
+            class_data = data[class_id]
+            updated = 0
+            for student_name, assignment_name, grade in grades:
+                if student_name not in class_data or assignment_name not in class_data[student_name]:
+                    continue
+                class_data[student_name][assignment_name]['score'] = grade
+                self.integrity.check_grade(data, class_id, student_name, assignment_name)
+                updated += 1
+            if updated:
+                with open(self.data_file, 'w') as file:
+                    json.dump(data, file, indent=4)
+            self.classes = list(data.keys())
+            self.current_class_data = class_data
+            if updated < len(grades):
+                return updated > 0, f"{updated} of {len(grades)} grades updated."
+            return True, f"{updated} grades updated."
+        except Exception as e:
+            return False, "Failed to update grades."
+
     def save_changes(self) -> bool:
         """
         Saves the changes made to the gradebook.
@@ -209,8 +490,10 @@ class GradebookController:
         Returns:
         - bool: True if the changes were saved successfully, False otherwise.
         """
+        if self.term is not None:
+            return False
         try:
-            with open('data.json', 'w') as file:
+            with open(self.data_file, 'w') as file:
                 json.dump(self.current_class_data, file, indent=4)
             return True
         except Exception as e:
@@ -227,15 +510,18 @@ class GradebookController:
         Returns:
         - Tuple[bool, str]: A tuple indicating whether the student was removed successfully (True/False) and a message describing the result.
         """
+        if self.term is not None:
+            return False, READ_ONLY_MESSAGE
         try:
-            with open('data.json', 'r') as file:
+            with open(self.data_file, 'r') as file:
                 data = json.load(file)
             if class_id not in data:
                 return False, "Class does not exist."
             if student_name not in data[class_id]:
                 return False, "Student does not exist."
             del data[class_id][student_name]
-            with open('data.json', 'w') as file:
+            self.integrity.check_class(data, class_id)
+            with open(self.data_file, 'w') as file:
                 json.dump(data, file, indent=4)
             self.load_data(class_id)
             return True, "Student removed successfully."
@@ -253,15 +539,18 @@ class GradebookController:
         Returns:
         - Tuple[bool, str]: A tuple indicating whether the assignment was removed successfully (True/False) and a message describing the result.
         """
+        if self.term is not None:
+            return False, READ_ONLY_MESSAGE
         try:
-            with open('data.json', 'r') as file:
+            with open(self.data_file, 'r') as file:
                 data = json.load(file)
             if class_id not in data:
                 return False, "Class does not exist."
             for student in data[class_id]:
                 if assignment_name in data[class_id][student]:
                     del data[class_id][student][assignment_name]
-            with open('data.json', 'w') as file:
+            self.integrity.check_class(data, class_id)
+            with open(self.data_file, 'w') as file:
                 json.dump(data, file, indent=4)
             self.load_data(class_id)
             return True, "Assignment removed successfully."
@@ -280,13 +569,27 @@ class GradebookController:
         - Union[int, None]: The overall grade for the student in the class, or None if the class or student does not exist.
         """
         try:
-            with open('data.json', 'r') as file:
-                data = json.load(file)
+            data = self.read_data()
             if class_id not in data or student_name not in data[class_id]:
                 return None
+            return self.compute_grade(data[class_id][student_name])
+        except Exception as e:
+            return None
+
+    def compute_grade(self, student_grades: Dict[str, Dict[str, Union[int, str]]]) -> Union[float, None]:
+        """
+        Computes the overall grade from a student's assignments without reading the gradebook file.
+
+        Parameters:
+        - student_grades (Dict[str, Dict[str, Union[int, str]]]): The student's assignments, as stored in the class data.
+
+        Returns:
+        - Union[float, None]: The overall grade as a percentage, or None if it cannot be computed.
+        """
+        try:
             total_points = 0
             earned_points = 0
-            for assignment in data[class_id][student_name].values():
+            for assignment in student_grades.values():
                 if assignment['score'] != "Not Graded":
                     total_points += assignment['max_points']
                     earned_points += assignment['score']
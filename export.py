@@ -0,0 +1,264 @@
+import csv
+import gzip
+import json
+import os
+import re
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, Set, Tuple, Union
+from controller import GradebookController
+
+# Supported export formats: format name -> (csv dialect, file extension, file encoding)
+# 'excel' writes a UTF-8 CSV with a byte order mark so spreadsheet applications
+# such as Excel open it with the right encoding.
+EXPORT_FORMATS = {
+    "csv": ("excel", ".csv", "utf-8"),
+    "tsv": ("excel-tab", ".tsv", "utf-8"),
+    "excel": ("excel", ".csv", "utf-8-sig"),
+}
+
+# Spreadsheet applications evaluate cells starting with these characters as formulas
+FORMULA_PREFIXES = ("=", "+", "-", "@")
+
+# Size of the first read when streaming classes out of the gradebook file
+READ_SIZE = 1 << 20
+
+
+def safe_filename(name: str) -> str:
+    """
+    Turns a class or student name into a file name.
+
+    Parameters:
+    - name (str): The class or student name.
+
+    Returns:
+    - str: The name with anything but letters, digits, '-', '_' and '.' replaced by '_'.
+    """
+    return re.sub(r"[^\w.-]", "_", name).strip(".") or "_"
+
+
+def unique_filename(name: str, used: Set[str]) -> str:
+    """
+    Turns a name into a file name that differs from every name in used, and records it there.
+
+    Names that only differ in characters safe_filename() replaces, or in case, would
+    otherwise overwrite each other, so later ones get a numeric suffix.
+
+    Parameters:
+    - name (str): The class or student name.
+    - used (Set[str]): The lowercased file names already taken.
+
+    Returns:
+    - str: The unique file name, without extension.
+    """
+    base = safe_filename(name)
+    filename = base
+    suffix = 2
+    while filename.lower() in used:
+        filename = f"{base}_{suffix}"
+        suffix += 1
+    used.add(filename.lower())
+    return filename
+
+
+def iter_classes(data_file: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yields (class ID, class data) pairs from a gradebook file, one class at a time,
+    so the whole gradebook is never held in memory.
+
+    Parameters:
+    - data_file (str): The gradebook file, or a '.json.gz' archived term.
+
+    Returns:
+    - Iterator[Tuple[str, Dict]]: The classes in file order.
+    """
+    decoder = json.JSONDecoder()
+    opener = gzip.open if data_file.endswith('.gz') else open
+    malformed = f"Malformed gradebook file: {data_file}"
+    with opener(data_file, 'rt') as file:
+        buffer = ""
+        pos = 0
+
+        def fill() -> bool:
+            # Reads at least as much again as is buffered, so a large class is only re-decoded a few times
+            nonlocal buffer, pos
+            chunk = file.read(max(READ_SIZE, len(buffer) - pos))
+            if not chunk:
+                return False
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return True
+
+        def next_char() -> str:
+            # Returns the next non-whitespace character without consuming it
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if not fill():
+                    raise ValueError(malformed)
+
+        def decode():
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if not fill():
+                        raise ValueError(malformed)
+                    continue
+                # A number ending at the end of the buffer may continue in the next read
+                if end == len(buffer) and fill():
+                    continue
+                pos = end
+                return value
+
+        def expect(char: str) -> None:
+            nonlocal pos
+            if next_char() != char:
+                raise ValueError(malformed)
+            pos += 1
+
+        expect("{")
+        if next_char() == "}":
+            return
+        while True:
+            if next_char() != '"':
+                raise ValueError(malformed)
+            class_id = decode()
+            expect(":")
+            next_char()
+            yield class_id, decode()
+            if next_char() == "}":
+                return
+            expect(",")
+
+
+def safe_cell(value: Union[int, float, str]) -> Union[int, float, str]:
+    """
+    Escapes text cells that a spreadsheet application would run as a formula.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def grade_rows(controller: GradebookController) -> Iterator[List[Union[int, float, str]]]:
+    """
+    Yields the header and one row per student for the class loaded in the controller.
+
+    Each row holds the student name, the score for every assignment, the final grade and the letter grade.
+    """
+    assignments = controller.get_assignments()
+    yield ["Student Name"] + [safe_cell(assignment) for assignment in assignments] + ["Final Grade", "Letter Grade"]
+    for student, student_grades in controller.current_class_data.items():
+        scores = [safe_cell(student_grades[assignment]['score']) if assignment in student_grades else "" for assignment in assignments]
+        percentage = controller.compute_grade(student_grades)
+        yield [safe_cell(student)] + scores + ["" if percentage is None else percentage, controller.convert_to_letter_grade(percentage)]
+
+
+def student_report(controller: GradebookController, class_id: str, student_name: str) -> str:
+    """
+    Renders the report for one student in the class loaded in the controller.
+
+    Returns:
+    - str: The report text.
+    """
+    student_grades = controller.current_class_data[student_name]
+    lines = [f"Student: {student_name}", f"Class: {class_id}", ""]
+    for assignment, grade in student_grades.items():
+        lines.append(f"{assignment}: {grade['score']} / {grade['max_points']}")
+    percentage = controller.compute_grade(student_grades)
+    letter_grade = controller.convert_to_letter_grade(percentage)
+    lines.append("")
+    lines.append(f"Final Grade: {letter_grade}" if percentage is None else f"Final Grade: {percentage}% ({letter_grade})")
+    return "\n".join(lines) + "\n"
+
+
+def export_class(job: Tuple[str, Dict, str, str, str, bool, int]) -> List[str]:
+    """
+    Exports one class: its grade sheet and, optionally, a report per student.
+
+    Rows are streamed to the file in chunks of chunk_size.
+
+    Parameters:
+    - job (Tuple[str, Dict, str, str, str, bool, int]): The class ID, the class data, the output directory, the unique file name for the class, the export format, whether to write student reports, and the chunk size.
+
+    Returns:
+    - List[str]: The paths of the written files.
+    """
+    class_id, class_data, output_dir, class_filename, fmt, reports, chunk_size = job
+    dialect, extension, encoding = EXPORT_FORMATS[fmt]
+    controller = GradebookController(load=False)
+    controller.current_class_data = class_data
+
+    sheet_path = os.path.join(output_dir, class_filename + extension)
+    with open(sheet_path, 'w', newline='', encoding=encoding) as file:
+        writer = csv.writer(file, dialect=dialect)
+        rows = grade_rows(controller)
+        chunk = list(islice(rows, chunk_size))
+        while chunk:
+            writer.writerows(chunk)
+            chunk = list(islice(rows, chunk_size))
+    paths = [sheet_path]
+
+    if reports:
+        report_dir = os.path.join(output_dir, "reports", class_filename)
+        os.makedirs(report_dir, exist_ok=True)
+        used = set()
+        for student in controller.get_students():
+            report_path = os.path.join(report_dir, unique_filename(student, used) + ".txt")
+            with open(report_path, 'w', encoding='utf-8') as file:
+                file.write(student_report(controller, class_id, student))
+            paths.append(report_path)
+    return paths
+
+
+def export_gradebook(output_dir: str, fmt: str = "csv", class_ids: Union[List[str], None] = None, reports: bool = False, data_file: str = 'data.json', workers: Union[int, None] = None, chunk_size: int = 1000) -> List[str]:
+    """
+    Exports the grades of every class to one file per class.
+
+    The gradebook file is read one class at a time and each class is exported in a
+    worker process. Only a few classes per worker are in flight at once, so memory
+    use depends on the size of a class, not of the gradebook.
+
+    Parameters:
+    - output_dir (str): The directory to write to. Created if it does not exist.
+    - fmt (str): 'csv', 'tsv' or 'excel'. Defaults to 'csv'.
+    - class_ids (Union[List[str], None]): The classes to export. Defaults to all classes.
+    - reports (bool): Whether to also write a report file per student. Defaults to False.
+    - data_file (str): The gradebook file to export, or a '.json.gz' archived term. Defaults to 'data.json'.
+    - workers (Union[int, None]): The number of worker processes. Defaults to the CPU count, 1 disables the pool.
+    - chunk_size (int): The number of rows written at a time. Defaults to 1000.
+
+    Returns:
+    - List[str]: The paths of the written files.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    os.makedirs(output_dir, exist_ok=True)
+    used = set()
+    jobs = (
+        (class_id, class_data, output_dir, unique_filename(class_id, used), fmt, reports, chunk_size)
+        for class_id, class_data in iter_classes(data_file)
+        if class_ids is None or class_id in class_ids
+    )
+    paths = []
+    if workers == 1:
+        for job in jobs:
+            paths.extend(export_class(job))
+        return paths
+    with Pool(workers) as pool:
+        # Pool.imap would read the whole file ahead into its task queue; keep a bounded window instead
+        pending = deque()
+        limit = 2 * (workers or os.cpu_count() or 1)
+        for job in jobs:
+            pending.append(pool.apply_async(export_class, (job,)))
+            if len(pending) >= limit:
+                paths.extend(pending.popleft().get())
+        while pending:
+            paths.extend(pending.popleft().get())
+    return paths
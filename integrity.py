@@ -0,0 +1,243 @@
+from collections import Counter
+from typing import Dict, List, NamedTuple, Tuple, Union
+
+NOT_GRADED = "Not Graded"
+
+# Issue kinds
+SCHEMA = "schema"
+MISSING = "missing"
+MAX_POINTS = "max_points"
+DIVISION = "division"
+
+
+class Issue(NamedTuple):
+    kind: str
+    class_id: Union[str, None]
+    student: Union[str, None]
+    assignment: Union[str, None]
+    message: str
+
+
+def is_number(value) -> bool:
+    """
+    Returns True for int and float values, but not for bools.
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def parse_score(value) -> Union[int, float, None]:
+    """
+    Parses a score stored as text, such as "85" or "92.5".
+
+    Returns:
+    - Union[int, float, None]: The parsed non-negative score, or None if the text is not a score.
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        number = float(value.strip())
+    except ValueError:
+        return None
+    if number < 0 or number != number:
+        return None
+    return int(number) if number.is_integer() else number
+
+
+class IntegrityChecker:
+    """
+    Validates gradebook data and keeps the issues found, per class.
+
+    The whole gradebook is checked once with check_all(); after that, mutations only
+    re-check what they touched with check_class() or check_grade().
+    """
+
+    def __init__(self, repair: bool = False):
+        """
+        Initializes an IntegrityChecker object.
+
+        Parameters:
+        - repair (bool): Whether to fix repairable issues in place while checking. Defaults to False.
+        """
+        self.repair = repair
+        self.checked = False
+        self.issues = {}
+
+    def get_issues(self) -> List[Issue]:
+        """
+        Returns all issues currently known.
+
+        Returns:
+        - List[Issue]: The issues, grouped by class.
+        """
+        return [issue for class_issues in self.issues.values() for issue in class_issues.values()]
+
+    def check_all(self, data: Dict) -> bool:
+        """
+        Checks the whole gradebook in one pass per class.
+
+        Parameters:
+        - data (Dict): The gradebook data, keyed by class ID.
+
+        Returns:
+        - bool: True if the data was repaired and needs to be saved, False otherwise.
+        """
+        self.issues = {}
+        self.checked = True
+        if not isinstance(data, dict):
+            self.issues[None] = {(SCHEMA, None, None): Issue(SCHEMA, None, None, None, "Gradebook is not a mapping of classes.")}
+            return False
+        changed = False
+        for class_id in data:
+            changed = self.check_class(data, class_id) or changed
+        return changed
+
+    def check_class(self, data: Dict, class_id: str) -> bool:
+        """
+        Re-checks one class, replacing the issues previously found in it.
+
+        Parameters:
+        - data (Dict): The gradebook data, keyed by class ID.
+        - class_id (str): The ID of the class to check.
+
+        Returns:
+        - bool: True if the class was repaired and needs to be saved, False otherwise.
+        """
+        self.issues.pop(class_id, None)
+        if class_id not in data:
+            return False
+        class_data = data[class_id]
+        class_issues = {}
+        changed = False
+        if not isinstance(class_data, dict):
+            class_issues[(SCHEMA, None, None)] = Issue(SCHEMA, class_id, None, None, "Class is not a mapping of students.")
+            self.issues[class_id] = class_issues
+            return False
+
+        # First pass: the assignment set and the max_points values used for each assignment
+        assignment_points = {}
+        for student, student_grades in class_data.items():
+            if not isinstance(student_grades, dict):
+                if self.repair:
+                    class_data[student] = {}
+                    changed = True
+                else:
+                    class_issues[(SCHEMA, student, None)] = Issue(SCHEMA, class_id, student, None, "Student is not a mapping of assignments.")
+                continue
+            for assignment, grade in student_grades.items():
+                points = assignment_points.setdefault(assignment, Counter())
+                if isinstance(grade, dict) and is_number(grade.get('max_points')) and grade['max_points'] >= 0:
+                    points[grade['max_points']] += 1
+        # Only a strict majority says which value is right; without one nothing is repaired
+        expected_points = {}
+        for assignment, points in assignment_points.items():
+            common = points.most_common()
+            expected_points[assignment] = common[0][0] if common and 2 * common[0][1] > sum(points.values()) else None
+            if len(common) > 1 and expected_points[assignment] is None:
+                values = ", ".join(str(value) for value, _ in common)
+                class_issues[(MAX_POINTS, None, assignment)] = Issue(MAX_POINTS, class_id, None, assignment, f"Students have different max_points ({values}) and no value is used by most of them.")
+
+        # Second pass: every cell, then the student's totals
+        for student, student_grades in class_data.items():
+            if not isinstance(student_grades, dict):
+                continue
+            for assignment, max_points in expected_points.items():
+                if assignment not in student_grades:
+                    if self.repair and max_points is not None:
+                        student_grades[assignment] = {"score": NOT_GRADED, "max_points": max_points}
+                        changed = True
+                    else:
+                        class_issues[(MISSING, student, assignment)] = Issue(MISSING, class_id, student, assignment, "Grade is missing.")
+                        continue
+                changed = self.check_cell(class_issues, class_id, student, assignment, student_grades, max_points) or changed
+            self.check_totals(class_issues, class_id, student, student_grades)
+
+        if class_issues:
+            self.issues[class_id] = class_issues
+        return changed
+
+    def check_grade(self, data: Dict, class_id: str, student: str, assignment: str) -> bool:
+        """
+        Re-checks a single grade after its score changed. The assignment's max_points
+        are unchanged, so only the score and the student's totals are checked.
+
+        Parameters:
+        - data (Dict): The gradebook data, keyed by class ID.
+        - class_id (str): The ID of the class.
+        - student (str): The name of the student.
+        - assignment (str): The name of the assignment.
+
+        Returns:
+        - bool: True if the grade was repaired and needs to be saved, False otherwise.
+        """
+        class_issues = self.issues.setdefault(class_id, {})
+        class_issues.pop((SCHEMA, student, assignment), None)
+        class_issues.pop((DIVISION, student, None), None)
+        student_grades = data[class_id][student]
+        changed = self.check_score(class_issues, class_id, student, assignment, student_grades[assignment])
+        self.check_totals(class_issues, class_id, student, student_grades)
+        if not class_issues:
+            del self.issues[class_id]
+        return changed
+
+    def check_cell(self, class_issues: Dict[Tuple, Issue], class_id: str, student: str, assignment: str, student_grades: Dict, max_points: Union[int, float, None]) -> bool:
+        """
+        Checks one grade against the schema and the max_points used by the rest of the class.
+
+        Returns:
+        - bool: True if the grade was repaired, False otherwise.
+        """
+        grade = student_grades[assignment]
+        if not isinstance(grade, dict):
+            if self.repair and max_points is not None:
+                student_grades[assignment] = {"score": NOT_GRADED, "max_points": max_points}
+                return True
+            class_issues[(SCHEMA, student, assignment)] = Issue(SCHEMA, class_id, student, assignment, "Grade is not a mapping with score and max_points.")
+            return False
+
+        changed = self.check_score(class_issues, class_id, student, assignment, grade)
+        points = grade.get('max_points')
+        if not (is_number(points) and points >= 0):
+            if self.repair and max_points is not None:
+                grade['max_points'] = max_points
+                changed = True
+            else:
+                class_issues[(MAX_POINTS, student, assignment)] = Issue(MAX_POINTS, class_id, student, assignment, f"max_points {points!r} is not a number.")
+        elif max_points is not None and points != max_points:
+            if self.repair:
+                grade['max_points'] = max_points
+                changed = True
+            else:
+                class_issues[(MAX_POINTS, student, assignment)] = Issue(MAX_POINTS, class_id, student, assignment, f"max_points is {points}, but {max_points} for most students.")
+        return changed
+
+    def check_score(self, class_issues: Dict[Tuple, Issue], class_id: str, student: str, assignment: str, grade: Dict) -> bool:
+        """
+        Checks that a score is a non-negative number or 'Not Graded'.
+
+        Returns:
+        - bool: True if the score was repaired, False otherwise.
+        """
+        score = grade.get('score')
+        if score == NOT_GRADED or (is_number(score) and score >= 0):
+            return False
+        parsed = parse_score(score)
+        if self.repair and parsed is not None:
+            grade['score'] = parsed
+            return True
+        message = f"Score {score!r} is stored as text." if parsed is not None else f"Score {score!r} is not a number or '{NOT_GRADED}'."
+        class_issues[(SCHEMA, student, assignment)] = Issue(SCHEMA, class_id, student, assignment, message)
+        return False
+
+    def check_totals(self, class_issues: Dict[Tuple, Issue], class_id: str, student: str, student_grades: Dict) -> None:
+        """
+        Flags students whose overall grade would divide by zero: graded work worth zero points in total.
+        """
+        total_points = 0
+        graded = False
+        for grade in student_grades.values():
+            if isinstance(grade, dict) and grade.get('score') != NOT_GRADED:
+                graded = True
+                if is_number(grade.get('max_points')):
+                    total_points += grade['max_points']
+        if graded and total_points == 0:
+            class_issues[(DIVISION, student, None)] = Issue(DIVISION, class_id, student, None, "Graded assignments are worth 0 points in total.")
@@ -1,43 +1,177 @@
-import random
+import argparse
+import gzip
 import json
+import os
+import random
+from collections import deque
+from itertools import accumulate
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple, Union
+
+NOT_GRADED = "Not Graded"
+NOT_GRADED_CHANCE = 0.1  # 10% chance of not graded yet
+MAX_POINTS = 100  # Assuming all assignments out of 100 points
+
+# Every possible cell value, drawn in a single weighted pass per class
+SCORE_POPULATION = list(range(MAX_POINTS + 1)) + [NOT_GRADED]
+SCORE_CUM_WEIGHTS = list(accumulate([(1 - NOT_GRADED_CHANCE) / (MAX_POINTS + 1)] * (MAX_POINTS + 1) + [NOT_GRADED_CHANCE]))
+
+# Storage formats the generator can stream to, keyed by file extension
+OPENERS = {
+    ".json.gz": lambda filename: gzip.open(filename, 'wt', encoding='utf-8'),
+    ".json": lambda filename: open(filename, 'w', encoding='utf-8'),
+}
+
+
+def class_seed(seed: int, class_index: int) -> str:
+    """
+    Derives the seed for a single class, so a class's data only depends on the
+    gradebook seed and its position and never on which worker generated it.
+    """
+    return f"{seed}:{class_index}"
+
+
+def generate_class(class_index: int, num_students: int, num_assignments: int, seed: int) -> Dict[str, Dict[str, Dict[str, Union[int, str]]]]:
+    """
+    Generates the student/assignment data for one class.
+
+    Parameters:
+    - class_index (int): The position of the class in the gradebook.
+    - num_students (int): The number of students in the class.
+    - num_assignments (int): The number of assignments per student.
+    - seed (int): The gradebook seed.
+
+    Returns:
+    - Dict: The class data in the same shape as data.json.
+    """
+    rng = random.Random(class_seed(seed, class_index))
+    scores = rng.choices(SCORE_POPULATION, cum_weights=SCORE_CUM_WEIGHTS, k=num_students * num_assignments)
+    assignment_names = [f"Assignment {j+1}" for j in range(num_assignments)]
+    class_data = {}
+    for i in range(num_students):
+        row = scores[i * num_assignments:(i + 1) * num_assignments]
+        class_data[f"Student {i+1}"] = {
+            assignment_name: {"score": score, "max_points": MAX_POINTS}
+            for assignment_name, score in zip(assignment_names, row)
+        }
+    return class_data
+
+
+def encode_class(job: Tuple[str, int, int, int, int]) -> str:
+    """
+    Worker entry point: generates one class and returns it as a JSON object member.
+    Encoding in the worker keeps the parent process down to writing strings.
+    """
+    course_name, class_index, num_students, num_assignments, seed = job
+    return f"{json.dumps(course_name)}: {json.dumps(generate_class(class_index, num_students, num_assignments, seed))}"
+
+
+def course_names(num_classes: int) -> List[str]:
+    """
+    Returns the generated class names.
+    """
+    return [f"Class {i+1}" for i in range(num_classes)]
+
+
+def write_stream(file: TextIO, members: Iterable[str]) -> None:
+    """
+    Writes encoded class members to a file as one JSON object, one class at a time.
+    """
+    file.write("{")
+    for idx, member in enumerate(members):
+        file.write(",\n" if idx else "\n")
+        file.write(member)
+    file.write("\n}\n")
+
+
+def encode_in_pool(pool: Pool, jobs: List[Tuple[str, int, int, int, int]], limit: int) -> Iterator[str]:
+    """
+    Yields encoded classes in job order, with at most limit classes generated ahead of the writer.
+    Pool.imap has no such bound, so a slow writer (e.g. gzip) would let finished classes pile up in memory.
+    """
+    pending = deque()
+    for job in jobs:
+        pending.append(pool.apply_async(encode_class, (job,)))
+        if len(pending) >= limit:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def open_output(filename: str) -> TextIO:
+    """
+    Opens the output file for the storage format matching its extension.
+    """
+    for extension, opener in OPENERS.items():
+        if filename.endswith(extension):
+            return opener(filename)
+    raise ValueError(f"Unsupported storage format: {filename}")
+
+
+def generate_gradebook(filename: str, num_classes: int, num_students: int, num_assignments: int, seed: Union[int, None] = None, workers: Union[int, None] = None) -> int:
+    """
+    Generates a mock gradebook and streams it to disk class by class.
+
+    Classes are generated in parallel worker processes. The output for a given
+    seed is identical regardless of the number of workers.
+
+    Parameters:
+    - filename (str): The file to write, '.json' or '.json.gz'.
+    - num_classes (int): The number of classes to generate.
+    - num_students (int): The number of students per class.
+    - num_assignments (int): The number of assignments per student.
+    - seed (Union[int, None]): The random seed. Defaults to a random seed.
+    - workers (Union[int, None]): The number of worker processes. Defaults to the CPU count, 1 disables the pool.
+
+    Returns:
+    - int: The seed used, so the gradebook can be regenerated.
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    jobs = [(name, idx, num_students, num_assignments, seed) for idx, name in enumerate(course_names(num_classes))]
+    with open_output(filename) as file:
+        if workers == 1:
+            write_stream(file, map(encode_class, jobs))
+        else:
+            with Pool(workers) as pool:
+                write_stream(file, encode_in_pool(pool, jobs, 2 * (workers or os.cpu_count() or 1)))
+    return seed
+
 
 class Gradebook:
-    def __init__(self, course_name, num_students, num_assignments):
+    def __init__(self, course_name, num_students, num_assignments, seed=None):
         self.course_name = course_name
         self.num_students = num_students
         self.num_assignments = num_assignments
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
         self.data = {self.course_name: {}}
         self.generate_mock_data()
 
     def generate_mock_data(self):
-        # Generate random student names
-        for i in range(self.num_students):
-            student_name = f"Student {i+1}"
-
-            # Initialize the student's record
-            self.data[self.course_name][student_name] = {}
-
-            # Generate random assignment data
-            for j in range(self.num_assignments):
-                assignment_name = f"Assignment {j+1}"
-                score = random.randint(0, 100)  # Random score between 0 and 100
-                max_points = 100  # Assuming all assignments out of 100 points
-                if random.random() < 0.1:  # 10% chance of not graded yet
-                    score = "Not Graded"
-
-                # Assign scores and max points
-                self.data[self.course_name][student_name][assignment_name] = {
-                    "score": score,
-                    "max_points": max_points
-                }
+        self.data[self.course_name] = generate_class(0, self.num_students, self.num_assignments, self.seed)
 
     def get_data(self):
         return self.data
 
     def save_to_file(self, filename):
-        with open(filename, 'w') as file:
+        with open_output(filename) as file:
             json.dump(self.data, file, indent=4)
 
-# Create an instance of the Gradebook class for a course
-gradebook = Gradebook("Math101", 25, 20)
-gradebook.save_to_file("data.json")
\ No newline at end of file
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate mock gradebook data.")
+    parser.add_argument("--output", default="data.json", help="Output file, .json or .json.gz")
+    parser.add_argument("--classes", type=int, default=None, help="Number of classes; omit for the single Math101 class")
+    parser.add_argument("--students", type=int, default=25)
+    parser.add_argument("--assignments", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.classes is None:
+        # Create an instance of the Gradebook class for a course
+        gradebook = Gradebook("Math101", args.students, args.assignments, args.seed)
+        gradebook.save_to_file(args.output)
+    else:
+        used_seed = generate_gradebook(args.output, args.classes, args.students, args.assignments, args.seed, args.workers)
+        print(f"Wrote {args.classes} classes to {args.output} (seed {used_seed})")
@@ -0,0 +1,115 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import export
+
+
+class IterClassesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, text: str, name: str = "data.json") -> str:
+        path = os.path.join(self.tmp.name, name)
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(path, 'wt') as file:
+            file.write(text)
+        return path
+
+    def assert_matches_json_load(self, text: str, read_size: int = export.READ_SIZE, name: str = "data.json") -> None:
+        path = self.write(text, name)
+        with mock.patch.object(export, 'READ_SIZE', read_size):
+            streamed = list(export.iter_classes(path))
+        self.assertEqual(streamed, list(json.loads(text).items()))
+
+    def assert_malformed(self, text: str, read_size: int = export.READ_SIZE) -> None:
+        path = self.write(text)
+        with mock.patch.object(export, 'READ_SIZE', read_size):
+            with self.assertRaises(ValueError):
+                list(export.iter_classes(path))
+
+    def gradebook(self, num_classes: int, num_students: int) -> dict:
+        return {
+            f"Class {c}": {
+                f"Student {s}": {f"Assignment {a}": {"score": (c + s + a) % 101, "max_points": 100} for a in range(10)}
+                for s in range(num_students)
+            }
+            for c in range(num_classes)
+        }
+
+    def test_empty_gradebook(self):
+        self.assert_matches_json_load("{}")
+        self.assert_matches_json_load(" \n{ \n\t} \n")
+
+    def test_class_larger_than_read_size(self):
+        text = json.dumps(self.gradebook(3, 20))
+        for read_size in (1, 7, 64, 1000):
+            with self.subTest(read_size=read_size):
+                self.assert_matches_json_load(text, read_size)
+
+    def test_whitespace_between_tokens(self):
+        text = ' \n {\n  "A" \n :\t{"s": {"h": {"score": 1, "max_points": 2}}} ,\r\n "B":{} \n}\n '
+        for read_size in (1, 3, export.READ_SIZE):
+            with self.subTest(read_size=read_size):
+                self.assert_matches_json_load(text, read_size)
+
+    def test_indented_file(self):
+        self.assert_matches_json_load(json.dumps(self.gradebook(2, 3), indent=4), 5)
+
+    def test_escaped_names(self):
+        self.assert_matches_json_load(json.dumps({'Cl"ass {1}': {}, "Kurs é": {"a,b": {}}}), 2)
+
+    def test_number_split_across_reads(self):
+        self.assert_matches_json_load('{"A": 12345, "B": 6}', 1)
+
+    def test_gzip_input(self):
+        text = json.dumps(self.gradebook(2, 5))
+        self.assert_matches_json_load(text, 16, name="term.json.gz")
+
+    def test_truncated_input(self):
+        text = json.dumps(self.gradebook(2, 3))
+        for cut in (0, 1, len(text) // 2, len(text) - 1):
+            with self.subTest(cut=cut):
+                self.assert_malformed(text[:cut], 8)
+
+    def test_malformed_input(self):
+        for text in ('[]', '{"A" {}}', '{"A": {},}', '{"A": {} "B": {}}', '{A: {}}', '{"A": {"s": }}', '{,}'):
+            with self.subTest(text=text):
+                self.assert_malformed(text, 4)
+
+
+class ExportGradebookTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.data_file = os.path.join(self.tmp.name, "data.json")
+        self.output_dir = os.path.join(self.tmp.name, "out")
+
+    def export(self, data: dict, **kwargs) -> list:
+        with open(self.data_file, 'w') as file:
+            json.dump(data, file)
+        return export.export_gradebook(self.output_dir, data_file=self.data_file, workers=1, **kwargs)
+
+    def test_colliding_names_get_unique_files(self):
+        grade = {"a": {"score": 1, "max_points": 2}}
+        paths = self.export({"Cls=1": {"John Smith": grade, "John_Smith": grade}, "Cls_1": {"x": grade}}, reports=True)
+        self.assertEqual(len(paths), len(set(paths)))
+        self.assertEqual(sorted(os.path.basename(path) for path in paths),
+                         ["Cls_1.csv", "Cls_1_2.csv", "John_Smith.txt", "John_Smith_2.txt", "x.txt"])
+
+    def test_text_cells_are_escaped(self):
+        data = {"C": {"=Bob": {"+HW": {"score": "=HYPERLINK(\"x\")", "max_points": 10}}}}
+        paths = self.export(data)
+        with open(paths[0], newline='') as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(rows[0][1], "'+HW")
+        self.assertEqual(rows[1][:2], ["'=Bob", "'=HYPERLINK(\"x\")"])
+
+
+if __name__ == "__main__":
+    unittest.main()
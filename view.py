@@ -1,10 +1,13 @@
 
-from typing import Dict, List
+from typing import Dict, List, Tuple, Union
 import tkinter as tk
-from tkinter import ttk, simpledialog, messagebox
-from controller import GradebookController
+from tkinter import ttk, simpledialog, messagebox, filedialog
+from controller import GradebookController, CURRENT_TERM
+from export import export_gradebook
 
 class GradebookApp:
+    CURRENT_TERM = CURRENT_TERM
+    COMMIT_DELAY_MS = 1000
 
     def __init__(self, master: tk.Tk) -> None:
         '''
@@ -22,13 +25,26 @@ class GradebookApp:
         self.geometry = "800x600"
         master.geometry(self.geometry)
         self.last_clicked = None
+        self.last_column = None
+        self.editing_cell = None
+        self.staged_grades = {}
+        self.staged_class = None
+        self.grid_class = None
+        self.commit_job = None
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
         
         self.label_welcome = tk.Label(master, text="Welcome to the Gradebook System", font=("Arial", 14))
         self.label_welcome.pack(pady=10)
         
-        self.label_instructions = tk.Label(master, text="Select a or add a class and manage grades\nAdd students or assignments to the class\nDouble click on a grade to edit it\n", font=("Arial", 12))
+        self.label_instructions = tk.Label(master, text="Select a or add a class and manage grades\nAdd students or assignments to the class\nDouble click on a grade or press Enter to edit it\nEnter and Tab move to the next grade, Ctrl+V pastes a column\n", font=("Arial", 12))
         self.label_instructions.pack(pady=10)
         
+        self.term_selection = ttk.Combobox(master, width=15, state='readonly')
+        self.term_selection['values'] = [self.CURRENT_TERM] + self.controller.get_terms()
+        self.term_selection.set(self.CURRENT_TERM)
+        self.term_selection.bind("<<ComboboxSelected>>", self.on_term_selected)
+        self.term_selection.pack(pady=5)
+
         self.class_selection = ttk.Combobox(master, width=15, state='readonly')
         self.class_selection['values'] = self.controller.classes
         self.class_selection.bind("<<ComboboxSelected>>", self.on_class_selected)
@@ -51,6 +67,18 @@ class GradebookApp:
         self.button_total_grade = tk.Button(self.button_frame, text="Total Grade", command=self.calculate_total_grade)
         self.button_total_grade.pack(fill=tk.X, padx=10, pady=10)
 
+        self.button_export = tk.Button(self.button_frame, text="Export Grades", command=self.export_grades)
+        self.button_export.pack(fill=tk.X, padx=10, pady=10)
+
+        self.button_student_history = tk.Button(self.button_frame, text="Student History", command=self.show_student_history)
+        self.button_student_history.pack(fill=tk.X, padx=10, pady=10)
+
+        self.button_archive_term = tk.Button(self.button_frame, text="Archive Term", command=self.archive_term)
+        self.button_archive_term.pack(fill=tk.X, padx=10, pady=10)
+
+        self.button_check_data = tk.Button(self.button_frame, text="Check Data", command=self.check_data)
+        self.button_check_data.pack(fill=tk.X, padx=10, pady=10)
+
         # Black line separator
         self.separator3 = ttk.Separator(self.button_frame, orient='horizontal')
         self.separator3.pack(fill=tk.X, pady=10)
@@ -83,6 +111,7 @@ class GradebookApp:
             Returns:
                 None
         '''
+        self.flush_edits()
         class_id = self.class_selection.get()
         students = self.controller.get_students()
         grade_list = []
@@ -102,6 +131,128 @@ class GradebookApp:
         
         grade_popup.mainloop()
 
+    def export_grades(self) -> None:
+        '''
+
+        Export the grades and a report per student for every class of the open term to a folder
+
+        Parameters:
+            None
+
+            Returns:
+                None
+        '''
+        self.flush_edits()
+        output_dir = filedialog.askdirectory(title="Export Grades", parent=self.master)
+        if output_dir:
+            try:
+                data_file = self.controller.data_file if self.controller.term is None else self.controller.archive_path(self.controller.term)
+                paths = export_gradebook(output_dir, fmt="excel", reports=True, data_file=data_file)
+                messagebox.showinfo("Success", f"Exported {len(paths)} files.", parent=self.master)
+            except Exception as e:
+                messagebox.showerror("Error", "Failed to export grades.", parent=self.master)
+
+    def on_term_selected(self, event) -> None:
+        '''
+
+        Handle the event when a term is selected. Archived terms open read-only
+
+        Parameters:
+            event (tk.Event): The event that triggered the function
+
+            Returns:
+                None
+        '''
+        self.flush_edits()
+        term_name = self.term_selection.get()
+        success, message = self.controller.open_term(None if term_name == self.CURRENT_TERM else term_name)
+        if not success:
+            messagebox.showerror("Error", message, parent=self.master)
+            return
+        self.class_selection['values'] = self.controller.classes
+        self.class_selection.set('')
+        self.update_treeview_columns([])
+        self.grades_view.delete(*self.grades_view.get_children())
+
+    def archive_term(self) -> None:
+        '''
+
+        Archive the current term and start a new, empty one
+
+        Parameters:
+            None
+
+            Returns:
+                None
+        '''
+        term_name = simpledialog.askstring("Archive Term", "Enter a name for the current term:", parent=self.master)
+        if term_name:
+            success, message = self.controller.archive_term(term_name)
+            if success:
+                self.term_selection['values'] = [self.CURRENT_TERM] + self.controller.get_terms()
+                self.term_selection.set(self.CURRENT_TERM)
+                self.on_term_selected(event=None)
+                messagebox.showinfo("Success", message, parent=self.master)
+            else:
+                messagebox.showerror("Error", message, parent=self.master)
+
+    def show_student_history(self) -> None:
+        '''
+
+        Show a student's grades across all terms and classes
+
+        Parameters:
+            None
+
+            Returns:
+                None
+        '''
+        student_name = simpledialog.askstring("Student History", "Enter student name:", parent=self.master)
+        if student_name:
+            history = self.controller.get_student_history(student_name)
+            if not history:
+                messagebox.showinfo("Student History", "No classes found for this student.", parent=self.master)
+                return
+            history_list = []
+            for term_name, class_id, percentage in history:
+                letter_grade = self.controller.convert_to_letter_grade(percentage)
+                history_list.append(f"{term_name or self.CURRENT_TERM} - {class_id}: {letter_grade} ({percentage}%)")
+
+            history_popup = tk.Toplevel(self.master)
+            history_popup.title(f"History for {student_name}")
+            history_popup.geometry("400x300")
+
+            history_label = tk.Label(history_popup, text="\n".join(history_list), font=("Arial", 12))
+            history_label.pack(pady=10)
+
+    def check_data(self) -> None:
+        '''
+
+        Show the integrity issues in the gradebook and offer to repair them
+
+        Parameters:
+            None
+
+            Returns:
+                None
+        '''
+        self.flush_edits()
+        issues = self.controller.get_integrity_issues()
+        if not issues:
+            messagebox.showinfo("Check Data", "No issues found.", parent=self.master)
+            return
+        issue_list = [f"{issue.class_id} / {issue.student or '-'} / {issue.assignment or '-'}: {issue.message}" for issue in issues[:20]]
+        if len(issues) > 20:
+            issue_list.append(f"... and {len(issues) - 20} more")
+        if messagebox.askyesno("Check Data", "\n".join(issue_list) + "\n\nRepair automatically where possible?", parent=self.master):
+            success, message = self.controller.repair_data()
+            if success:
+                messagebox.showinfo("Success", message, parent=self.master)
+                if self.class_selection.get():
+                    self.on_class_selected(event=None)
+            else:
+                messagebox.showerror("Error", message, parent=self.master)
+
     def on_class_selected(self, event) -> None:
         '''
         
@@ -113,8 +264,10 @@ class GradebookApp:
             Returns:
                 None
         '''
+        self.flush_edits()
         class_id = self.class_selection.get()
         self.controller.load_data(class_id)
+        self.grid_class = class_id
         assignments = self.controller.get_assignments()
         student_names = self.controller.get_students()
         self.update_treeview_columns(assignments)
@@ -190,11 +343,26 @@ class GradebookApp:
         self.tree_scroll = tk.Scrollbar(self.tree_frame)
         self.tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
 
+        self.status_label = tk.Label(self.tree_frame, text="", anchor='w')
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
+
         self.grades_view = ttk.Treeview(self.tree_frame, yscrollcommand=self.tree_scroll.set, columns=[], show="headings")
         self.grades_view.pack(fill=tk.BOTH, expand=True)
         self.tree_scroll.config(command=self.grades_view.yview)
 
         self.grades_view.bind("<Double-1>", self.edit_grade)
+        self.grades_view.bind("<Return>", self.edit_focused_grade)
+
+        self.cell_editor = tk.Entry(self.grades_view, justify='center')
+        self.cell_editor.bind("<Return>", lambda event: self.on_editor_move(1, 0))
+        self.cell_editor.bind("<Tab>", lambda event: self.on_editor_move(0, 1))
+        self.cell_editor.bind("<Shift-Tab>", lambda event: self.on_editor_move(0, -1))
+        if self.master.tk.call('tk', 'windowingsystem') == 'x11':
+            # X11 reports Shift+Tab as its own keysym
+            self.cell_editor.bind("<ISO_Left_Tab>", lambda event: self.on_editor_move(0, -1))
+        self.cell_editor.bind("<Escape>", self.on_editor_escape)
+        self.cell_editor.bind("<FocusOut>", self.on_editor_blur)
+        self.cell_editor.bind("<<Paste>>", self.paste_column)
 
     def on_cell_click(self, event: tk.Event) -> None:
         '''
@@ -207,6 +375,9 @@ class GradebookApp:
             Returns:
                 None
         '''
+        # The release of a double click lands after the editor opened; taking focus here would close it
+        if self.editing_cell is not None:
+            return
         row_id = self.grades_view.identify_row(event.y)
         column_id = self.grades_view.identify_column(event.x)
         student_name = self.grades_view.item(row_id, 'values')[0]
@@ -219,6 +390,8 @@ class GradebookApp:
         self.grades_view.focus(row_id)
 
         self.last_clicked = (student_name,assignment_name)
+        if int(column_id[1:]) > 1:
+            self.last_column = int(column_id[1:]) - 1
     
     def update_treeview_columns(self, assignments: List[str]) -> None:
         '''
@@ -310,87 +483,312 @@ class GradebookApp:
                     messagebox.showinfo("Success", message if success else "Failed to add assignment")
                     self.on_class_selected(event=None)
 
-    def edit_grade(self, event: tk.Event) -> None:
+    def edit_grade(self, event: tk.Event) -> str:
         '''
-        Edit the grade of a student in the treeview
-        
+        Open the inline editor on the double clicked grade
+
         Parameters:
             event (tk.Event): The event that triggered the function
-            
+
             Returns:
-                None
+                str: "break" to stop the default handling
         '''
         region = self.grades_view.identify("region", event.x, event.y)
         if region == "cell":
             col_id = int(self.grades_view.identify_column(event.x).replace('#', '')) - 1
             row_id = self.grades_view.identify_row(event.y)
             if col_id > 0:
-                self.update_grade(col_id, row_id)
-    
-    def update_grade(self, col_id: int, row_id: str) -> None:
+                self.open_cell_editor(row_id, col_id)
+        return "break"
+
+    def edit_focused_grade(self, event: tk.Event) -> str:
         '''
-        Update the grade of a student in the treeview
-        
+        Open the inline editor on the last clicked grade of the focused row
+
         Parameters:
-            col_id (int): The id of the column in the treeview
-            row_id (str): The id of the row in the treeview
-            
+            event (tk.Event): The event that triggered the function
+
             Returns:
-                None
+                str: "break" to stop the default handling
         '''
-        current_value = self.grades_view.item(row_id, 'values')[col_id]
-        new_grade = simpledialog.askinteger("Update Grade", "Enter new grade:", parent=self.master, initialvalue=current_value)
-        if new_grade is not None and new_grade >= 0:
-            student_name = self.grades_view.item(row_id, 'values')[0]
-            assignment_name = self.grades_view.column("#{}".format(col_id + 1), option="id")
-            self.check_and_update_grade(student_name, assignment_name, new_grade, row_id, col_id)
-    
-    def check_and_update_grade(self, student_name: str, assignment_name: str, new_grade: int, row_id: str, col_id: int) -> None:
+        row_id = self.grades_view.focus()
+        if row_id:
+            self.open_cell_editor(row_id, self.last_column or 1)
+        return "break"
+
+    def open_cell_editor(self, row_id: str, col_id: int) -> None:
         '''
-        Check if the new grade is higher than the maximum points and ask for confirmation
-        
+        Show the inline editor over a grade in the treeview
+
         Parameters:
-            student_name (str): The name of the student
-            assignment_name (str): The name of the assignment
-            new_grade (int): The new grade
             row_id (str): The id of the row in the treeview
             col_id (int): The id of the column in the treeview
-            
+
+            Returns:
+                None
+        '''
+        if self.controller.term is not None:
+            self.status_label.config(text="Archived terms are read-only.")
+            return
+        self.grades_view.see(row_id)
+        self.grades_view.update_idletasks()
+        bbox = self.grades_view.bbox(row_id, "#{}".format(col_id + 1))
+        if not bbox:
+            return
+        x, y, width, height = bbox
+        self.editing_cell = (row_id, col_id)
+        self.last_column = col_id
+        self.grades_view.selection_set(row_id)
+        self.grades_view.focus(row_id)
+        self.cell_editor.delete(0, tk.END)
+        self.cell_editor.insert(0, self.grades_view.item(row_id, 'values')[col_id])
+        self.cell_editor.select_range(0, tk.END)
+        self.cell_editor.place(x=x, y=y, width=width, height=height)
+        self.cell_editor.focus_set()
+
+    def close_cell_editor(self) -> None:
+        '''
+        Hide the inline editor without staging its value
+
+        Parameters:
+            None
+
             Returns:
                 None
         '''
-        max_points = self.controller.get_max_points(assignment_name)
-        if new_grade > max_points:
-            confirmation = messagebox.askyesno("Confirmation", "The new grade is higher than the maximum points. Do you want to proceed?", parent=self.master)
-            if confirmation:
-                self.update_grade_in_controller_and_view(student_name, assignment_name, new_grade, row_id, col_id)
+        self.editing_cell = None
+        self.cell_editor.place_forget()
+
+    def on_editor_move(self, row_step: int, col_step: int) -> str:
+        '''
+        Stage the edited grade and move the editor to a neighbouring cell.
+        Tab wraps to the next row at the end of a row
+
+        Parameters:
+            row_step (int): The number of rows to move
+            col_step (int): The number of columns to move
+
+            Returns:
+                str: "break" to stop the default key handling
+        '''
+        if self.editing_cell is None or not self.stage_editor_value():
+            return "break"
+        row_id, col_id = self.editing_cell
+        rows = self.grades_view.get_children()
+        last_col = len(self.grades_view["columns"]) - 1
+        row_idx = rows.index(row_id) + row_step
+        col_id += col_step
+        if col_id > last_col:
+            col_id, row_idx = 1, row_idx + 1
+        elif col_id < 1:
+            col_id, row_idx = last_col, row_idx - 1
+        if 0 <= row_idx < len(rows):
+            self.open_cell_editor(rows[row_idx], col_id)
         else:
-            self.update_grade_in_controller_and_view(student_name, assignment_name, new_grade, row_id, col_id)
-    
-    def update_grade_in_controller_and_view(self, student_name: str, assignment_name: str, new_grade: int, row_id: str, col_id: int) -> None:
+            self.close_cell_editor()
+            self.grades_view.focus_set()
+        return "break"
+
+    def on_editor_escape(self, event: tk.Event) -> str:
         '''
-        Update the grade in the controller and the treeview
+        Discard the grade being typed and close the editor
+
+        Parameters:
+            event (tk.Event): The event that triggered the function
+
+            Returns:
+                str: "break" to stop the default key handling
+        '''
+        self.close_cell_editor()
+        self.grades_view.focus_set()
+        return "break"
+
+    def on_editor_blur(self, event: tk.Event) -> None:
+        '''
+        Stage the edited grade and commit the staged grades when the editor loses focus
+
+        Parameters:
+            event (tk.Event): The event that triggered the function
+
+            Returns:
+                None
+        '''
+        self.flush_edits()
+
+    def parse_grade(self, text: str) -> Union[int, None]:
+        '''
+        Parse a typed or pasted grade
+
+        Parameters:
+            text (str): The text to parse
+
+            Returns:
+                Union[int, None]: The grade, or None if the text is not a grade of 0 or more
+        '''
+        try:
+            grade = int(text.strip())
+        except ValueError:
+            return None
+        return grade if grade >= 0 else None
+
+    def stage_editor_value(self) -> bool:
+        '''
+        Stage the grade typed in the inline editor
+
+        Parameters:
+            None
+
+            Returns:
+                bool: False if the typed text is not a valid grade, True otherwise
+        '''
+        row_id, col_id = self.editing_cell
+        text = self.cell_editor.get()
+        if text.strip() == str(self.grades_view.item(row_id, 'values')[col_id]):
+            return True
+        grade = self.parse_grade(text)
+        if grade is None:
+            self.master.bell()
+            return False
+        self.stage_grade(row_id, col_id, grade)
+        return True
+
+    def paste_column(self, event: tk.Event) -> Union[str, None]:
+        '''
+        Paste a column of grades from the clipboard, starting at the edited cell and moving down
+
+        Parameters:
+            event (tk.Event): The event that triggered the function
+
+            Returns:
+                Union[str, None]: "break" to stop the default paste, None to paste a single value into the editor
+        '''
+        if self.editing_cell is None:
+            return "break"
+        try:
+            lines = [line.split('\t')[0] for line in self.master.clipboard_get().splitlines() if line.strip()]
+        except tk.TclError:
+            return "break"
+        if len(lines) <= 1:
+            return None
+        grades = [self.parse_grade(line) for line in lines]
+        if None in grades:
+            messagebox.showerror("Error", "The clipboard holds values that are not grades.", parent=self.master)
+            return "break"
+        row_id, col_id = self.editing_cell
+        rows = self.grades_view.get_children()
+        start = rows.index(row_id)
+        for target_row, grade in zip(rows[start:], grades):
+            self.stage_grade(target_row, col_id, grade)
+        self.close_cell_editor()
+        self.grades_view.focus_set()
+        self.commit_staged_grades()
+        return "break"
+
+    def stage_grade(self, row_id: str, col_id: int, grade: int) -> None:
+        '''
+        Show a new grade in the treeview and stage it to be committed with the next batch
 
         Parameters:
-            student_name (str): The name of the student
-            assignment_name (str): The name of the assignment
-            new_grade (int): The new grade
             row_id (str): The id of the row in the treeview
             col_id (int): The id of the column in the treeview
+            grade (int): The new grade
 
-        Returns:
+            Returns:
+                None
+        '''
+        values = list(self.grades_view.item(row_id, 'values'))
+        values[col_id] = grade
+        self.grades_view.item(row_id, values=values)
+        assignment_name = self.grades_view.column("#{}".format(col_id + 1), option="id")
+        self.staged_class = self.grid_class
+        self.staged_grades[(values[0], assignment_name)] = grade
+        if self.commit_job is not None:
+            self.master.after_cancel(self.commit_job)
+        self.commit_job = self.master.after(self.COMMIT_DELAY_MS, self.commit_staged_grades)
+
+    def commit_staged_grades(self) -> bool:
+        '''
+        Commit all staged grades to the controller as one batch.
+        Grades the controller did not save are reverted in the treeview
+
+        Parameters:
+            None
+
+            Returns:
+                bool: True if every staged grade was saved, False otherwise
+        '''
+        if self.commit_job is not None:
+            self.master.after_cancel(self.commit_job)
+            self.commit_job = None
+        if not self.staged_grades:
+            return True
+        grades = [(student, assignment, grade) for (student, assignment), grade in self.staged_grades.items()]
+        self.staged_grades = {}
+        success, message = self.controller.update_grades(self.staged_class, grades)
+        if not success:
+            self.controller.load_data(self.staged_class)
+        rejected = self.revert_unsaved_grades(grades)
+        if not success:
+            messagebox.showerror("Error", message, parent=self.master)
+            self.status_label.config(text="")
+            return False
+        max_points = {assignment: self.controller.get_max_points(assignment) for _, assignment, _ in grades}
+        over_max = sum(1 for _, assignment, grade in grades if isinstance(max_points[assignment], int) and grade > max_points[assignment])
+        if over_max:
+            message += f" {over_max} above the maximum points."
+        self.status_label.config(text=message)
+        return not rejected
+
+    def revert_unsaved_grades(self, grades: List[Tuple[str, str, int]]) -> int:
+        '''
+        Show the saved value again for every committed grade the controller did not save
+
+        Parameters:
+            grades (List[Tuple[str, str, int]]): The committed (student name, assignment name, grade) updates
+
+            Returns:
+                int: The number of grades that were not saved
+        '''
+        class_data = self.controller.current_class_data
+        unsaved = [(student, assignment) for student, assignment, grade in grades
+                   if class_data.get(student, {}).get(assignment, {}).get('score') != grade]
+        if unsaved and self.staged_class == self.grid_class:
+            columns = list(self.grades_view["columns"])
+            rows = {self.grades_view.item(row_id, 'values')[0]: row_id for row_id in self.grades_view.get_children()}
+            for student, assignment in unsaved:
+                if student in rows and assignment in columns:
+                    values = list(self.grades_view.item(rows[student], 'values'))
+                    values[columns.index(assignment)] = class_data.get(student, {}).get(assignment, {}).get('score', "")
+                    self.grades_view.item(rows[student], values=values)
+        return len(unsaved)
+
+    def flush_edits(self) -> bool:
+        '''
+        Stage the grade in the open editor, close it and commit all staged grades
+
+        Parameters:
             None
+
+            Returns:
+                bool: True if every staged grade was saved, False otherwise
         '''
-        success = self.controller.update_grade(self.class_selection.get(), student_name, assignment_name, new_grade)
-        if success:
-            values = list(self.grades_view.item(row_id, 'values'))
-            values[col_id] = new_grade
-            self.grades_view.item(row_id, values=values)
-            self.on_class_selected(event=None)
-        else:
-            messagebox.showinfo("Info", "Grade not updated.", parent=self.master)
+        if self.editing_cell is not None:
+            self.stage_editor_value()
+            self.close_cell_editor()
+        return self.commit_staged_grades()
 
+    def on_close(self) -> None:
+        '''
+        Commit the staged grades and close the application. The window stays open if they could not be saved
 
+        Parameters:
+            None
+
+            Returns:
+                None
+        '''
+        if self.flush_edits():
+            self.master.destroy()
 
 if __name__ == "__main__":
     root = tk.Tk()